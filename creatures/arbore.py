@@ -1,16 +1,21 @@
 from ursina import *
 import random
+import numpy as np
+from creatures.base import SimBase
 
 
-class Arbore(Entity):
-    def __init__(self):
+class Arbore(SimBase):
+    def __init__(self, position=None, **kwargs):
         super().__init__(
             model="assets/tree.obj",
             scale=0.1,
             color=Vec4(0.13, 0.25, 0.13, 1),
+            **kwargs,
         )
-        self.placeRandom()
-        self.killMe = False
+        if position is None:
+            self.placeRandom()
+        else:
+            self.position = position
         self.metadata = {"type": "Tree"}
 
     def placeRandom(self):
@@ -19,5 +24,16 @@ class Arbore(Entity):
             random.randint(-1 * range, range), 0, random.randint(-1 * range, range)
         )
 
-    def mupdate(self):
-        pass
+
+class Forest(SimBase):
+    """all of the trees, baked into one mesh so the whole forest is one draw call"""
+
+    def __init__(self, count):
+        super().__init__()
+        # every spot rolled at once instead of two randints per tree
+        spots = np.random.randint(-20, 21, size=(count, 2)).tolist()
+        for x, z in spots:
+            Arbore(position=Vec3(x, 0, z), parent=self)
+        # merges every tree into our model and destroys the originals
+        self.combine()
+        self.metadata = {"type": "Forest"}
@@ -0,0 +1,14 @@
+from ursina import *
+
+
+class SimBase(Entity):
+    """the parent of everything living in the prarie, so the world can read
+    these attributes on any entity without checking that they exist"""
+
+    clicked = False
+    killMe = False
+    makeOffspring = False
+    metadata = None
+
+    def mupdate(self, dt):
+        pass
@@ -1,8 +1,33 @@
 from ursina import *
-import names
+import numpy as np
+from creatures import namebook
+from creatures.base import SimBase
+from creatures import _kernel
 
+# the columns a bobcat pack keeps in its state arrays
+stateFields = {
+    "x": np.float32,
+    "z": np.float32,
+    "dx": np.float32,
+    "dz": np.float32,
+    "age": np.float32,
+    "walkTimer": np.float32,
+    "pregnancyTimer": np.float32,
+    "lifeExpectancy": np.float32,
+    "nourishment": np.float32,
+    # velocity and time left while stalking a rabbit
+    "hx": np.float32,
+    "hz": np.float32,
+    "huntTimer": np.float32,
+    "pregnant": np.bool_,
+}
+
+
+class Bobcat(SimBase):
+    # (min, max) in days for the timers the simulation rolls at spawn
+    lifeExpectancyRange = (4000, 5475)
+    pregnancyRange = (625, 1095)
 
-class Bobcat(Entity):
     def __init__(self, position=(0, 0, 0)):
         super().__init__(
             model="assets/bobcat.obj",
@@ -11,55 +36,53 @@ class Bobcat(Entity):
             color=color.brown,
         )
         self.metadata = {
-            "name": names.get_first_name(),
-            "lastname": names.get_last_name(),
+            "name": namebook.get_first_name(),
+            "lastname": namebook.get_last_name(),
             "type": "Bobcat",
             "age": 0,
             "offspring": 0,
         }
-        self.clicked = False
-        self.modes = ["idle", "walk", "hunt", "death", "babyidle", "babymake"]
-        self.idleTimer = random.randint(0, 4)
-        self.mode = self.modes[0]
-        # kill me, kills the entity in a game loop
-        self.killMe = False
-        self.lifeExpectancy = random.randint(4000, 5475)
-        # sets a timer until pregnancy
-        self.pregnancyTimer = random.randint(625, 1095)
-        self.makeOffspring = False
-        self.myDirection = random.randint(-1, 2)
-        self.directionToWalk = Vec3(random.choice([-1, 1]), 0, random.choice([-1, 1]))
-        self.walkTimer = random.randint(0, 4)
-        self.nourishment = 10
 
-    def mupdate(self):
-        self.metadata["age"] += 42 * time.dt
-        self.nourishment -= 1 * time.dt
-        if self.metadata["age"] > self.lifeExpectancy:  # die when old
-            self.killMe = True
-        if self.metadata["age"] > self.pregnancyTimer:
-            self.metadata["offspring"] += 1
-            self.pregnancyTimer += random.randint(1000, 2000)
-            self.makeOffspring = True
-        if not self.clicked:
-            self.color = color.brown
-            self.walkTimer -= time.dt
-            self.x += self.directionToWalk.x * time.dt
-            self.z += self.directionToWalk.z * time.dt
-        if self.x > 20 or self.x < -20 or self.z > 20 or self.z < -20:
-            self.mode = self.modes[0]
-            self.walkTimer = random.randint(0, 4)
-            if self.x < 0:
-                self.directionToWalk.x = 1
-            elif self.x > 0:
-                self.directionToWalk.x = -1
-            if self.z < 0:
-                self.directionToWalk.z = 1
-            elif self.z > 0:
-                self.directionToWalk.z = -1
-        if self.walkTimer <= 0:
-            self.mode = self.modes[0]
-            self.walkTimer = random.randint(0, 4)
-            self.directionToWalk = Vec3(
-                random.choice([-1, 1]), 0, random.choice([-1, 1])
-            )
+
+def tick(state, dt):
+    """moves every bobcat in the pack forward by dt seconds, returns who got pregnant"""
+    if _kernel.enabled:
+        return _kernel.tickBobcats(
+            dt,
+            state["x"],
+            state["z"],
+            state["dx"],
+            state["dz"],
+            state["age"],
+            state["walkTimer"],
+            state["pregnancyTimer"],
+            state["nourishment"],
+            state["hx"],
+            state["hz"],
+            state["huntTimer"],
+            state["pregnant"],
+        )
+    state["age"] += 42 * dt
+    state["nourishment"] -= 1 * dt
+    state["walkTimer"] -= dt
+    # a stalking bobcat heads straight for its prey, otherwise it wanders
+    hunting = state["huntTimer"] > 0
+    state["huntTimer"][hunting] -= dt
+    state["x"] += np.where(hunting, state["hx"], state["dx"]) * dt
+    state["z"] += np.where(hunting, state["hz"], state["dz"]) * dt
+    # bobcats that left the prarie turn back towards the middle
+    x, z = state["x"], state["z"]
+    oob = (np.abs(x) > 20) | (np.abs(z) > 20)
+    state["walkTimer"][oob] = np.random.randint(0, 5, oob.sum())
+    # one masked store per axis, a creature sitting on 0 keeps its direction
+    state["dx"][:] = np.where(oob & (x != 0), -np.sign(x), state["dx"])
+    state["dz"][:] = np.where(oob & (z != 0), -np.sign(z), state["dz"])
+    turn = state["walkTimer"] <= 0
+    state["walkTimer"][turn] = np.random.randint(0, 5, turn.sum())
+    state["dx"][turn] = np.random.randint(0, 2, turn.sum()) * 2 - 1
+    state["dz"][turn] = np.random.randint(0, 2, turn.sum()) * 2 - 1
+    # pregnancy
+    due = state["age"] > state["pregnancyTimer"]
+    state["pregnancyTimer"][due] += np.random.randint(1000, 2001, due.sum())
+    state["pregnant"] |= due
+    return due
@@ -1,54 +1,76 @@
 from ursina import *
-from random import uniform
+import numpy as np
 
 
-class BloodParticle(Entity):
-    def __init__(self, pos, **kwargs):
+class BloodSystem(Entity):
+    """every drop of blood in the prarie, kept in numpy arrays and drawn
+    as a single point cloud that is re-uploaded once per frame"""
+
+    def __init__(self, capacity=4096, **kwargs):
         super().__init__(
-            model="quad",
+            model=Mesh(mode="point", thickness=0.1, static=False),
             texture="circle",
-            color=color.rgb(180, 0, 0),
-            position=pos,
-            scale=uniform(0.05, 0.2),
-            billboard=True,
             **kwargs,
         )
-        # emphasize upward motion and variety
-        self.velocity = Vec3(
-            uniform(-2, 2),  # sideways spread
-            uniform(6, 14),  # much stronger upward velocity
-            uniform(-2, 2),
-        )
-        self.fade = uniform(0.5, 1.2)
-        self.gravity = Vec3(0, -9, 0)  # stronger gravity pull
+        self.capacity = capacity
+        self.count = 0
+        self.pos = np.zeros((capacity, 3), np.float32)
+        self.vel = np.zeros((capacity, 3), np.float32)
+        self.opacity = np.zeros(capacity, np.float32)
+        self.fade = np.zeros(capacity, np.float32)
+        self.rgba = np.zeros((capacity, 4), np.float32)
+        self.rgba[:, :3] = tuple(color.rgb32(180, 0, 0))[:3]
+        self.gravity = -9  # stronger gravity pull, only ever along y
         self.killMe = False
         self.metadata = {"type": "Death"}
 
-    def update(self):
-        self.velocity += self.gravity * time.dt
-        self.position += self.velocity * time.dt
-        self.color = color.rgba(
-            self.color.r,
-            self.color.g,
-            self.color.b,
-            self.color.a - self.fade * time.dt,
-        )
-        if self.color.a <= 0:
-            destroy(self)
+    def emit(self, pos, count=1):
+        # drops that don't fit are simply never spawned
+        count = min(count, self.capacity - self.count)
+        new = slice(self.count, self.count + count)
+        self.pos[new] = (pos[0], pos[1], pos[2])
+        self.pos[new, 1] += np.random.uniform(0, 1, count)
+        # emphasize upward motion and variety
+        self.vel[new, 0] = np.random.uniform(-2, 2, count)  # sideways spread
+        self.vel[new, 1] = np.random.uniform(6, 14, count)  # much stronger upward velocity
+        self.vel[new, 2] = np.random.uniform(-2, 2, count)
+        self.opacity[new] = 1
+        self.fade[new] = np.random.uniform(0.5, 1.2, count)
+        self.count += count
 
-    @staticmethod
-    def blood_explosion(pos):
+    def blood_explosion(self, pos):
         # big burst
-        for _ in range(400):  # higher count for thicker blood spray
-            BloodParticle(position=(pos[0], pos[1] + uniform(0, 1), pos[2]))
+        self.emit(pos, 400)  # higher count for thicker blood spray
+
+    def update(self):
+        count = self.count
+        if not count:
+            return
+        dt = time.dt
+        pos, vel, alpha = self.pos[:count], self.vel[:count], self.opacity[:count]
+        vel[:, 1] += self.gravity * dt
+        pos += vel * dt
+        alpha -= self.fade[:count] * dt
+        alive = alpha > 0
+        if not alive.all():
+            # faded drops are squeezed out, the rest keep their order
+            count = int(alive.sum())
+            for array in (self.pos, self.vel, self.opacity, self.fade):
+                array[:count] = np.compress(alive, array[: self.count], axis=0)
+            self.count = count
+        self.rgba[:count, 3] = self.opacity[:count]
+        self.model.vertices = self.pos[:count].ravel()
+        self.model.colors = self.rgba[:count].ravel()
+        self.model.generate()
 
 
 # demo use
 if __name__ == "__main__":
     app = Ursina()
+    blood = BloodSystem()
 
     def input(key):
         if key == "space":
-            BloodParticle.blood_explosion((0, 0, 0))
+            blood.blood_explosion((0, 0, 0))
 
     app.run()
@@ -1,9 +1,10 @@
 from ursina import *
 from ursina import texture
 from ursina.entity import TextureStage
+from creatures.base import SimBase
 
 
-class Grass(Entity):
+class Grass(SimBase):
     def __init__(self, x, z):
         super().__init__(
             model="cube",
@@ -18,8 +19,4 @@ class Grass(Entity):
             collider="mesh",
             color=Vec4(0.31, 0.47, 0.24, 1),
         )
-        self.killMe = False
         self.metadata = {"type": "Grass"}
-
-    def mupdate(self):
-        pass
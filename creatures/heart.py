@@ -1,7 +1,8 @@
 from ursina import *
+from creatures.base import SimBase
 
 
-class FloatingHeart(Entity):
+class FloatingHeart(SimBase):
     def __init__(self, pos=(0, 0, 0), **kwargs):
         super().__init__(
             model="assets/heart.obj",
@@ -14,14 +15,14 @@ class FloatingHeart(Entity):
         )
         self.lifetime = 2
         self.speed = 0.5
+        # fades from 1 to 0 over its lifetime
+        self.opacity = 1.0
 
-    def mupdate(self):
-        self.position += Vec3(0, self.speed, 0) * time.dt
-        self.color = color.rgba(
-            self.color.r,
-            self.color.g,
-            self.color.b,
-            self.color.a - (255 / self.lifetime) * time.dt,
-        )
-        if self.color.a <= 0:
+    def mupdate(self, dt):
+        self.position += Vec3(0, self.speed, 0) * dt
+        # only the alpha of the model's color scale changes, no new colors
+        self.opacity -= dt / self.lifetime
+        if self.opacity <= 0:
             destroy(self)
+        else:
+            self.model.setAlphaScale(self.opacity)
@@ -0,0 +1,34 @@
+import bisect
+import random
+import names
+
+
+def loadNames(filename):
+    """reads one of the names package's census files into two lists, the names
+    and their cummulative percentage"""
+    people, cummulative = [], []
+    with open(filename) as name_file:
+        for line in name_file:
+            name, _, total, _ = line.split()
+            people.append(name.capitalize())
+            cummulative.append(float(total))
+    return people, cummulative
+
+
+# names.get_first_name() re-reads its whole file for every name, so read them once
+tables = {key: loadNames(filename) for key, filename in names.FILES.items()}
+
+
+def pick(key):
+    # same draw as names.get_name, the first name whose cummulative % passes it
+    people, cummulative = tables[key]
+    index = bisect.bisect_right(cummulative, random.random() * 90)
+    return people[index] if index < len(people) else ""
+
+
+def get_first_name():
+    return pick(random.choice(("first:male", "first:female")))
+
+
+def get_last_name():
+    return pick("last")
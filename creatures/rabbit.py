@@ -1,9 +1,39 @@
 from ursina import *
-import names
+import numpy as np
+from creatures import namebook
+from creatures.base import SimBase
+from creatures import _kernel
 
+# all of the states that a rabbit can have, stored as an index into this list
+modes = ["idle", "walk", "flee", "death", "babyidle", "babymake"]
+IDLE, WALK, FLEE = 0, 1, 2
 
-class Rabbit(Entity):
-    def __init__(self, position=(random.randint(-10, 10), 0, random.randint(-10, 10))):
+# the columns a rabbit herd keeps in its state arrays
+stateFields = {
+    "x": np.float32,
+    "z": np.float32,
+    "dx": np.float32,
+    "dz": np.float32,
+    "age": np.float32,
+    "idleTimer": np.float32,
+    "walkTimer": np.float32,
+    "pregnancyTimer": np.float32,
+    "lifeExpectancy": np.float32,
+    "mode": np.int8,
+    "pregnant": np.bool_,
+}
+
+
+# rolled once when the module loads, every new rabbit starts here
+spawnPoint = (random.randint(-10, 10), 0, random.randint(-10, 10))
+
+
+class Rabbit(SimBase):
+    # (min, max) in days for the timers the simulation rolls at spawn
+    lifeExpectancyRange = (1000, 2555)
+    pregnancyRange = (500, 1000)
+
+    def __init__(self, position=spawnPoint, onSelect=None):
         super().__init__(
             scale=0.3,
             position=position,
@@ -14,73 +44,92 @@ class Rabbit(Entity):
             texture_scale=(10, 10),
             on_click=self.clicked,
         )
-        # all of the states that the rabbit can have
-        self.modes = ["idle", "walk", "flee", "death", "babyidle", "babymake"]
-        self.idleTimer = random.randint(0, 4)
-        self.walkTimer = random.randint(0, 4)
-        self.mode = self.modes[0]
         # clicked, if clicked the entity is selected in our invetory thing
         self.clicked = False
+        # told about every click, so whoever caches the selection knows it changed
+        self.onSelect = onSelect
         # entity metadata for our little explorer
-        self.metadata = {
-            "name": names.get_first_name(),
-            "lastname": names.get_last_name(),
+        self.metadata = self.newMetadata()
+
+    def newMetadata(self):
+        return {
+            "name": namebook.get_first_name(),
+            "lastname": namebook.get_last_name(),
             "type": "Rabbit",
             "age": 0,
             "offspring": 0,
         }
-        self.directionToWalk = Vec3(random.choice([-1, 1]), 0, random.choice([-1, 1]))
-        # kill me, kills the entity in a game loop
-        self.killMe = False
-        self.lifeExpectancy = random.randint(1000, 2555)
-        # sets a timer until pregnancy
-        self.pregnancyTimer = random.randint(500, 1000)
-        self.makeOffspring = False
 
-    def mupdate(self):
-        # handle if we're not clicked
-        # get older
-        self.metadata["age"] += 42 * time.dt
-        if self.metadata["age"] > self.lifeExpectancy:  # die when old
-            self.killMe = True
-        if self.metadata["age"] > self.pregnancyTimer:
-            self.metadata["offspring"] += 1
-            self.pregnancyTimer += random.randint(1000, 2000)
-            self.makeOffspring = True
-        if not self.clicked:
-            self.color = color.white
-        # superseding all movement:
-        if self.mode == "idle":
-            self.idleTimer -= time.dt
-            if self.idleTimer <= 0:
-                self.mode = self.modes[1]
-                self.idleTimer = random.randint(0, 4)
-        elif self.mode == "walk":
-            self.walkTimer -= time.dt
-            self.x += self.directionToWalk.x * time.dt
-            self.z += self.directionToWalk.z * time.dt
-            if self.x > 20 or self.x < -20 or self.z > 20 or self.z < -20:
-                self.mode = self.modes[0]
-                self.walkTimer = random.randint(0, 4)
-                if self.x < 0:
-                    self.directionToWalk.x = 1
-                elif self.x > 0:
-                    self.directionToWalk.x = -1
-                if self.z < 0:
-                    self.directionToWalk.z = 1
-                elif self.z > 0:
-                    self.directionToWalk.z = -1
-            if self.walkTimer <= 0:
-                self.mode = self.modes[0]
-                self.walkTimer = random.randint(0, 4)
-                self.directionToWalk = Vec3(
-                    random.choice([-1, 1]), 0, random.choice([-1, 1])
-                )
-        elif self.mode == "flee":
+    def reset(self, position=spawnPoint):
+        """brings a pooled rabbit back as a newborn, keeping its model and collider"""
+        self.enabled = True
+        self.position = position
+        self.clicked = False
+        self.color = color.white
+        self.metadata = self.newMetadata()
+
+    def recolor(self, mode):
+        # fleeing wins over being selected
+        if mode == FLEE:
             self.color = color.red
-            self.x += self.directionToWalk.x * time.dt
-            self.z += self.directionToWalk.z * time.dt
+        elif self.clicked:
+            self.color = color.yellow
+        else:
+            self.color = color.white
 
     def clicked(self):
         self.clicked = True
         self.color = color.yellow
+        if self.onSelect is not None:
+            self.onSelect(self)
+
+
+def tick(state, dt):
+    """moves every rabbit in the herd forward by dt seconds, returns who got pregnant"""
+    if _kernel.enabled:
+        return _kernel.tickRabbits(
+            dt,
+            state["x"],
+            state["z"],
+            state["dx"],
+            state["dz"],
+            state["age"],
+            state["idleTimer"],
+            state["walkTimer"],
+            state["pregnancyTimer"],
+            state["mode"],
+            state["pregnant"],
+        )
+    mode = state["mode"]
+    state["age"] += 42 * dt
+    idle = mode == IDLE
+    walk = mode == WALK
+    moving = walk | (mode == FLEE)
+    # idle rabbits wait out their timer, then start walking
+    state["idleTimer"][idle] -= dt
+    wake = idle & (state["idleTimer"] <= 0)
+    mode[wake] = WALK
+    state["idleTimer"][wake] = np.random.randint(0, 5, wake.sum())
+    # walking and fleeing rabbits move along their direction
+    state["walkTimer"][walk] -= dt
+    state["x"][moving] += state["dx"][moving] * dt
+    state["z"][moving] += state["dz"][moving] * dt
+    # walkers that left the prarie stop and turn back towards the middle
+    x, z = state["x"], state["z"]
+    oob = walk & ((np.abs(x) > 20) | (np.abs(z) > 20))
+    mode[oob] = IDLE
+    state["walkTimer"][oob] = np.random.randint(0, 5, oob.sum())
+    # one masked store per axis, a creature sitting on 0 keeps its direction
+    state["dx"][:] = np.where(oob & (x != 0), -np.sign(x), state["dx"])
+    state["dz"][:] = np.where(oob & (z != 0), -np.sign(z), state["dz"])
+    # walkers whose timer ran out rest and pick a new direction
+    turn = walk & (state["walkTimer"] <= 0)
+    mode[turn] = IDLE
+    state["walkTimer"][turn] = np.random.randint(0, 5, turn.sum())
+    state["dx"][turn] = np.random.randint(0, 2, turn.sum()) * 2 - 1
+    state["dz"][turn] = np.random.randint(0, 2, turn.sum()) * 2 - 1
+    # pregnancy
+    due = state["age"] > state["pregnancyTimer"]
+    state["pregnancyTimer"][due] += np.random.randint(1000, 2001, due.sum())
+    state["pregnant"] |= due
+    return due
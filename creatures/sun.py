@@ -1,7 +1,8 @@
 from ursina import *
+from creatures.base import SimBase
 
 
-class Sun(Entity):
+class Sun(SimBase):
     def __init__(self, position=(0, 20, 0)):
         super().__init__(
             model="sphere",
@@ -14,12 +15,11 @@ class Sun(Entity):
         self.radius = 20
         self.angle = 0  # 1 = increasing, -1 = decreasing
         self.speed = 0.1  # degrees per second
-        self.killMe = False
         self.metadata = {"type": "Sun"}
 
-    def mupdate(self):
+    def mupdate(self, dt):
         # move in a vertical circular path
-        self.angle += self.speed * time.dt
+        self.angle += self.speed * dt
 
         # circular arc: X constant, Y/Z follow a circle
         self.y = math.sin(self.angle) * self.radius
@@ -2,149 +2,387 @@
 from enum import EnumType
 import csv
 from creatures import bobcat, rabbit, sun, arbore, grass, death, heart
+import os
 import random
+import logging
 from ursina import *
-import os
+from panda3d.core import Filename
+import numpy as np
+
+log = logging.getLogger("sim")
+
+# a rabbit runs from a bobcat this close, and is caught this close
+fleeRadius = 5
+eatRadius = 3
+
+
+def loadSound(path):
+    """the sound at path as an Audio, or None when this machine doesn't have it"""
+    if not os.path.exists(path):
+        return None
+    clip = loader.loadSfx(Filename.fromOsSpecific(path))
+    return Audio(clip, autoplay=False) if clip else None
+
+
+def randomSign():
+    """-1 or 1, from a single random bit"""
+    return (random.getrandbits(1) << 1) - 1
+
+
+class Herd:
+    """a group of one species, whose simulation state lives in numpy arrays
+    with one row per creature. the entities are only drawn, never ticked"""
+
+    def __init__(self, fields, capacity=64):
+        self.entities = []
+        # entity -> row, so a creature can be found without a scan
+        self.rows = {}
+        self.arrays = {name: np.zeros(capacity, dtype) for name, dtype in fields.items()}
+
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def __getitem__(self, index):
+        return self.entities[index]
+
+    @property
+    def state(self):
+        """views over the rows that are currently alive"""
+        count = len(self.entities)
+        return {name: array[:count] for name, array in self.arrays.items()}
+
+    def add(self, entity, **values):
+        row = len(self.entities)
+        if row == len(self.arrays["x"]):
+            # out of room, double every column
+            for name, array in self.arrays.items():
+                self.arrays[name] = np.concatenate([array, np.zeros_like(array)])
+        self.entities.append(entity)
+        self.rows[entity] = row
+        values.setdefault("x", entity.x)
+        values.setdefault("z", entity.z)
+        for name, array in self.arrays.items():
+            array[row] = values.get(name, 0)
+        return row
+
+    def remove(self, row):
+        """drops a row by moving the last one into its place, returns its entity"""
+        last = len(self.entities) - 1
+        entity = self.entities[row]
+        if row != last:
+            for array in self.arrays.values():
+                array[row] = array[last]
+            moved = self.entities[last]
+            self.entities[row] = moved
+            self.rows[moved] = row
+        self.entities.pop()
+        del self.rows[entity]
+        return entity
 
 
 class Manhattan:
     """a small class that represents life inside of the konza prarie"""
 
-    def __init__(self, worldChunkSize=50, kSelected=2, rSelected=15, forestCount=30):
+    def __init__(
+        self,
+        worldChunkSize=50,
+        kSelected=2,
+        rSelected=15,
+        forestCount=30,
+        # the old cap of 75 entities, less the trees, grass and sun it counted
+        maxCreatures=43,
+    ):
         self.myEntities = []
+        # entity -> index in myEntities
+        self.entityIndex = {}
+        # everything that isn't a creature, these still update themselves
+        self.scenery = []
+        self.rabbits = Herd(rabbit.stateFields)
+        # dead rabbits wait here, hidden, until a birth can reuse them
+        self._rabbitPool = []
+        self.predators = Herd(bobcat.stateFields)
         self.kSelectedCount = kSelected
         self.rSelectedCount = rSelected
         self.forestCount = forestCount
+        self.maxCreatures = maxCreatures
         self.worldChunkSize = worldChunkSize
+        # the macos system sounds, loaded once up front so playing them is just
+        # a handle call. None anywhere they don't exist, and then we stay quiet
+        self.popSound = loadSound("/System/Library/Sounds/Pop.aiff")
+        self.bassoSound = loadSound("/System/Library/Sounds/Basso.aiff")
+        self.blood = death.BloodSystem()
         self.createWorld()
         self.paused = False
-        self.predators = []
         # metadata clicked handler
+        # the last entity getClickedEntity found, only searched for again once
+        # a click, birth or death could have changed it
+        self.clickedEntity = None
+        self._dirty = True
 
     def clearClicked(self):
+        self._dirty = True
         for entity in self.myEntities:
-            try:
-                entity.clicked = False
-            except AttributeError:
-                pass
+            entity.clicked = False
+        for entity, mode in zip(self.rabbits, self.rabbits.state["mode"]):
+            entity.recolor(mode)
+
+    def selected(self, entity):
+        """a creature was clicked, so the cached selection has to be found again"""
+        self._dirty = True
 
     def getClickedEntity(self, previousMetadata):
-        for entity in self.myEntities:
-            try:
-                if entity.clicked == True:
-                    return entity.metadata
-            except AttributeError:
-                pass
+        if self._dirty:
+            self._dirty = False
+            self.clickedEntity = next(
+                (entity for entity in self.myEntities if entity.clicked), None
+            )
+        if self.clickedEntity is not None:
+            return self.clickedEntity.metadata
         nonemeta = False
         return nonemeta
 
     def createWorld(self):
         """creates and populates a simulated world and enviornment at the konza prarie"""
+        self.rollDice()
         # go through each k, r, and tree species
         # for _ in range(self.kSelectedCount):
-        # self.myEntities.append(bobcat.Bobcat())
+        # self.addPredator()
         for _ in range(self.rSelectedCount):
-            self.myEntities.append(rabbit.Rabbit())
-        for _ in range(self.forestCount):
-            self.myEntities.append(arbore.Arbore())
+            self.addRabbit()
+        # trees never change, they don't need an update at all
+        self.forest = arbore.Forest(self.forestCount)
+        self.track(self.forest)
         # now let's make cubes of dirt, in a sizexsize with a z of 1
-        self.myEntities.append(grass.Grass(self.worldChunkSize, self.worldChunkSize))
+        self.addScenery(grass.Grass(self.worldChunkSize, self.worldChunkSize))
+
+        self.addScenery(sun.Sun())
+
+    def rollDice(self, size=256):
+        """rolls every random number a spawn needs in one go, so spawning a
+        creature just takes the next row instead of calling into random"""
+        self.diceRow = 0
+        self.dice = {
+            "direction": np.random.randint(0, 2, size=(size, 2)) * 2 - 1,
+            "timer": np.random.randint(0, 5, size=(size, 2)),
+        }
+        for species in (rabbit.Rabbit, bobcat.Bobcat):
+            low, high = species.lifeExpectancyRange
+            self.dice[species, "lifeExpectancy"] = np.random.randint(low, high + 1, size)
+            low, high = species.pregnancyRange
+            self.dice[species, "pregnancyTimer"] = np.random.randint(low, high + 1, size)
 
-        self.myEntities.append(sun.Sun())
+    def nextDice(self):
+        if self.diceRow == len(self.dice["timer"]):
+            self.rollDice()
+        self.diceRow += 1
+        return self.diceRow - 1
 
-    def updateCreatures(self):
+    def track(self, entity):
+        self._dirty = True
+        self.entityIndex[entity] = len(self.myEntities)
+        self.myEntities.append(entity)
+
+    def untrack(self, entity):
+        """removes an entity from myEntities by swapping the last one into its place"""
+        self._dirty = True
+        index = self.entityIndex.pop(entity)
+        last = self.myEntities.pop()
+        if last is not entity:
+            self.myEntities[index] = last
+            self.entityIndex[last] = index
+
+    def addScenery(self, entity):
+        self.track(entity)
+        self.scenery.append(entity)
+
+    def addRabbit(self):
+        if self._rabbitPool:
+            entity = self._rabbitPool.pop()
+            entity.reset()
+        else:
+            entity = rabbit.Rabbit(onSelect=self.selected)
+        self.track(entity)
+        dice, roll = self.dice, self.nextDice()
+        self.rabbits.add(
+            entity,
+            dx=dice["direction"][roll, 0],
+            dz=dice["direction"][roll, 1],
+            idleTimer=dice["timer"][roll, 0],
+            walkTimer=dice["timer"][roll, 1],
+            lifeExpectancy=dice[rabbit.Rabbit, "lifeExpectancy"][roll],
+            pregnancyTimer=dice[rabbit.Rabbit, "pregnancyTimer"][roll],
+            mode=rabbit.IDLE,
+        )
+        return entity
+
+    def addPredator(self):
+        """drops a well fed bobcat into the prarie, already stalking a rabbit"""
+        entity = bobcat.Bobcat()
+        self.track(entity)
+        dice, roll = self.dice, self.nextDice()
+        row = self.predators.add(
+            entity,
+            dx=dice["direction"][roll, 0],
+            dz=dice["direction"][roll, 1],
+            walkTimer=dice["timer"][roll, 1],
+            lifeExpectancy=dice[bobcat.Bobcat, "lifeExpectancy"][roll],
+            pregnancyTimer=dice[bobcat.Bobcat, "pregnancyTimer"][roll],
+            nourishment=10,
+        )
+        self.hunt(row)
+        return entity
+
+    def hunt(self, row):
+        """points a bobcat at a random rabbit, it gets there in 6 seconds"""
+        try:
+            newPrey = random.choice(self.rabbits)
+        except IndexError:
+            return False
+        preyRow = self.rabbits.rows[newPrey]
+        rabbitState = self.rabbits.state
+        state = self.predators.state
+        self.predators[row].look_at(newPrey)
+        # move over time, in a straight line
+        state["hx"][row] = (rabbitState["x"][preyRow] - state["x"][row]) / 6
+        state["hz"][row] = (rabbitState["z"][preyRow] - state["z"][row]) / 6
+        state["huntTimer"][row] = 6
+        return True
+
+    def updateCreatures(self, dt):
         clickedMetadata = None
 
-        # update entity positions
-        for entity in self.myEntities:
-            entity.mupdate()
-            # handles birth
-            try:
-                if entity.makeOffspring and len(self.myEntities) < 75:
-                    self.myEntities.append(rabbit.Rabbit())
-                    os.system("afplay /System/Library/Sounds/Pop.aiff &")
-                    print("BIRTH!")
-                    entity.makeOffspring = False
-                    # destroy(entity)
-            except AttributeError:
-                pass
-            # handle running away in fear
-            for predators in self.predators:
-                # sneakily, make sure that the predator is following an entity
-                if entity.metadata["type"] == "Rabbit":  # only for rabbtis
+        for entity in self.scenery:
+            entity.mupdate(dt)
+
+        # step every creature at once
+        for herd, module in ((self.rabbits, rabbit), (self.predators, bobcat)):
+            for row in np.flatnonzero(module.tick(herd.state, dt)):
+                herd[row].metadata["offspring"] += 1
+
+        # handles birth
+        for herd in (self.rabbits, self.predators):
+            for row in np.flatnonzero(herd.state["pregnant"]):
+                if len(self.rabbits) + len(self.predators) >= self.maxCreatures:
+                    break
+                self.addRabbit()
+                if self.popSound is not None:
+                    self.popSound.play()
+                log.debug("BIRTH!")
+                # looked up again, adding a rabbit can reallocate the arrays
+                herd.arrays["pregnant"][row] = False
+
+        # draw everyone where the simulation put them
+        for herd in (self.rabbits, self.predators):
+            state = herd.state
+            for entity, x, z in zip(herd, state["x"].tolist(), state["z"].tolist()):
+                entity.position = (x, 0, z)
+
+        self.stalk(dt)
+
+        # handles death
+        # dying from old age
+        rabbitState = self.rabbits.state
+        predatorState = self.predators.state
+        rabbitsDying = rabbitState["age"] > rabbitState["lifeExpectancy"]
+        # dying from old age, or starvation
+        starving = predatorState["nourishment"] <= 0
+        for row in np.flatnonzero(starving):
+            log.debug("hungry!!!")
+        predatorsDying = (
+            predatorState["age"] > predatorState["lifeExpectancy"]
+        ) | starving
+        for herd, dying in ((self.rabbits, rabbitsDying), (self.predators, predatorsDying)):
+            # last row first, so the rows still to go never move
+            for row in np.flatnonzero(dying)[::-1]:
+                entity = self.kill(herd, row)
+                log.debug("%s just died. RIP 🥀", entity.metadata["name"])
+
+        clickedMetadata = self.getClickedEntity(clickedMetadata) or None
+        # the metadata age is only kept fresh for whoever is selected
+        for herd in (self.rabbits, self.predators):
+            row = herd.rows.get(self.clickedEntity)
+            if row is not None:
+                clickedMetadata["age"] = float(herd.state["age"][row])
+        return clickedMetadata
+
+    def stalk(self, dt):
+        """lets the bobcats eat, and scare, every rabbit close to them"""
+        rabbitState = self.rabbits.state
+        predatorState = self.predators.state
+        mode = rabbitState["mode"]
+        xs, zs = rabbitState["x"].tolist(), rabbitState["z"].tolist()
+        # bucket the rabbits into cells as wide as the flee radius, so a bobcat
+        # only has to look at its own cell and the 8 around it
+        grid = {}
+        for row, (x, z) in enumerate(zip(xs, zs)):
+            grid.setdefault((int(x // fleeRadius), int(z // fleeRadius)), []).append(row)
+        fleeRadius2, eatRadius2 = fleeRadius * fleeRadius, eatRadius * eatRadius
+        scared = np.zeros(len(self.rabbits), dtype=bool)
+        eaten = np.zeros(len(self.rabbits), dtype=bool)
+        fed = []
+        for predatorRow, (px, pz) in enumerate(
+            zip(predatorState["x"].tolist(), predatorState["z"].tolist())
+        ):
+            cx, cz = int(px // fleeRadius), int(pz // fleeRadius)
+            for cell in (
+                (cx + i, cz + j) for i in (-1, 0, 1) for j in (-1, 0, 1)
+            ):
+                for row in grid.get(cell, ()):
+                    if eaten[row]:
+                        continue
+                    ddx, ddz = xs[row] - px, zs[row] - pz
+                    d2 = ddx * ddx + ddz * ddz
                     if (
-                        entity.position - predators.position
-                    ).length() < 3 and predators.nourishment < 3:
+                        d2 < eatRadius2
+                        and predatorState["nourishment"][predatorRow] < 3
+                        and predatorRow not in fed
+                    ):
                         # too late, get eaten and die
-                        self.myEntities.remove(entity)
-                        # add blood from entity
-                        # don't add it to the list because i don't want to track it's existance
-                        death.BloodParticle(entity.position)
-                        os.system("afplay /System/Library/Sounds/Basso.aiff &")
-
-                        # and remove it
-                        destroy(entity)
-                        rabbits = [
-                            rabbit
-                            for rabbit in self.myEntities
-                            if rabbit.metadata["type"] == "Rabbit"
-                        ]
-                        try:
-                            newPrey = random.choice(rabbits).position
-                            predators.look_at(newPrey)
-                            predators.animate_position(
-                                newPrey, duration=6, curve=curve.linear
-                            )  # move over time
-                            predators.nourishment = 7
-                            print("i was fed dont fret my brother")
-                        except IndexError:
-                            pass
-
-                        break
-                    if entity.mode != "flee":  # see what the entity mode is
-                        if (entity.position - predators.position).length() < 5:
-                            entity.mode = "flee"  # aka run for your life
-                            fleeDirection = (
-                                entity.position - predators.position
-                            ).normalized()
-                            entity.directionToWalk += fleeDirection * time.dt * 2
-
-                    elif entity.mode == "flee":  # redudant but verbose
-                        if (
-                            entity.position - predators.position
-                        ).length() > 5 and entity.metadata["type"] == "Rabbit":
-                            # no worries, now we're all dandy
-                            entity.mode = "walk"  # just idle animation
-                            entity.directionToWalk = Vec3(
-                                random.choice([-1, 1]), 0, random.choice([-1, 1])
-                            )
-                            entity.walkTimer = random.randint(0, 4)
-
-            # handles death
-            # dying from starvation
-            if entity.metadata["type"] == "Bobcat" and entity.nourishment <= 0:
-                print("hungry!!!")
-
-                entity.killMe = True
-            if entity.killMe:
-                # remove the entity from update
-                self.myEntities.remove(entity)
-                if entity.metadata["type"] == "Bobcat":
-                    self.predators.remove(entity)
-                # add blood from entity
-                # don't add it to the list because i don't want to track it's existance
-                death.BloodParticle(entity.position)
-                os.system("afplay /System/Library/Sounds/Basso.aiff &")
-
-                # and remove it
-                destroy(entity)
-
-                print(entity.metadata["name"] + " just died. RIP 🥀")
-            # there's a lot of tries because i don't want to make a parent class
-            # and have these attriibutes pass
-            try:
-                if entity.clicked == True:
-                    clickedMetadata = entity.metadata
-            except AttributeError:
-                pass
-        return clickedMetadata
+                        eaten[row] = True
+                        fed.append(predatorRow)
+                    elif d2 < fleeRadius2:
+                        scared[row] = True
+                        if mode[row] != rabbit.FLEE:
+                            mode[row] = rabbit.FLEE  # aka run for your life
+                            # nudge away from the bobcat, along the unit direction
+                            push = dt * 2 / math.sqrt(d2) if d2 else 0
+                            rabbitState["dx"][row] += ddx * push
+                            rabbitState["dz"][row] += ddz * push
+                            self.rabbits[row].recolor(mode[row])
+
+        # no bobcat close by, now we're all dandy
+        calm = (mode == rabbit.FLEE) & ~scared & ~eaten
+        for row in np.flatnonzero(calm):
+            mode[row] = rabbit.WALK  # just idle animation
+            rabbitState["dx"][row] = randomSign()
+            rabbitState["dz"][row] = randomSign()
+            rabbitState["walkTimer"][row] = random.randint(0, 4)
+            self.rabbits[row].recolor(mode[row])
+
+        # last row first, so the rows still to go never move
+        for row in np.flatnonzero(eaten)[::-1]:
+            self.kill(self.rabbits, row)
+        for predatorRow in fed:
+            if self.hunt(predatorRow):
+                predatorState["nourishment"][predatorRow] = 7
+                log.debug("i was fed dont fret my brother")
+
+    def kill(self, herd, row):
+        entity = herd.remove(row)
+        # remove the entity from update
+        self.untrack(entity)
+        # add blood from entity
+        self.blood.emit(entity.position)
+        if self.bassoSound is not None:
+            self.bassoSound.play()
+
+        # and remove it, a rabbit is only hidden so the next birth can reuse it
+        if herd is self.rabbits:
+            entity.enabled = False
+            self._rabbitPool.append(entity)
+        else:
+            destroy(entity)
+        return entity
@@ -9,13 +9,21 @@ from panda3d.core import loadPrcFileData
 from creatures import bobcat
 from time import sleep
 import csv
+import atexit
+import queue
+import threading
+import logging
 import webbrowser
 
 # LOCAL MODULES
 import envio
 
-# Open AI Voice Agent in browser
-webbrowser.open('https://elevenlabs.io/app/talk-to?agent_id=agent_0101k7vyy29heqr9rvy4fmqs6psv')
+# Open AI Voice Agent in browser, off the main thread so the window isn't held up
+threading.Thread(
+    target=webbrowser.open,
+    args=('https://elevenlabs.io/app/talk-to?agent_id=agent_0101k7vyy29heqr9rvy4fmqs6psv',),
+    daemon=True,
+).start()
 
 loadPrcFileData("", "sync-video false")  # disables v-sync pause
 loadPrcFileData("", "want-pstats false")  # optional
@@ -80,74 +88,127 @@ rabCounter = Text(
     position=(0.01, 0.01),
 )
 
-app = Ursina()
-
 
 def input(key):
     if key == "space":
-        print("clicked!")
+        log.debug("clicked!")
         envio.paused = not envio.paused
+        # a paused sim has no task at all, rather than one that checks a flag
+        if envio.paused:
+            taskMgr.remove("sim")
+        else:
+            taskMgr.add(simTask, "sim")
     if key == "p":  # adds a predator
-        mybob = bobcat.Bobcat()
-        envio.myEntities.append(mybob)
-        envio.predators.append(mybob)
-        rabbits = [
-            rabbit for rabbit in envio.myEntities if rabbit.metadata["type"] == "Rabbit"
-        ]
-        try:
-            newPrey = random.choice(rabbits).position
-            mybob.look_at(newPrey)
-            mybob.animate_position(
-                newPrey, duration=6, curve=curve.linear
-            )  # move over time
-            mybob.nourishment = 10
-        except IndexError:
-            pass
+        envio.addPredator()
     if key == "left mouse down":
         envio.clearClicked()
 
 
 # CSV ingreation
-def logCSV(t, prey, predators, filename="data.csv"):
-    with open(filename, "a", newline="") as f:
-        writer = csv.writer(f)
-        if f.tell() == 0:  # write header once
-            writer.writerow(["time", "prey", "predators"])
-        writer.writerow([t, prey, predators])
+# opened once with a big buffer, a worker thread does the writing so the
+# frame never waits on the disk
+csvFile = open("data.csv", "a", buffering=65536, newline="")
+csvWriter = csv.writer(csvFile)
+if csvFile.tell() == 0:  # write header once
+    csvWriter.writerow(["time", "prey", "predators"])
+csvQueue = queue.Queue()
+
+
+def csvWorker(flushEvery=10):
+    unflushed = 0
+    while True:
+        row = csvQueue.get()
+        if row is None:  # the app is closing
+            break
+        csvWriter.writerow(row)
+        unflushed += 1
+        if unflushed >= flushEvery:
+            csvFile.flush()
+            unflushed = 0
+    csvFile.close()
+
+
+csvThread = threading.Thread(target=csvWorker, daemon=True)
+csvThread.start()
+
+
+def closeCSV():
+    csvQueue.put(None)
+    csvThread.join()
+
+
+atexit.register(closeCSV)
+
+
+def logCSV(t, prey, predators):
+    csvQueue.put_nowait((t, prey, predators))
 
 
 # MAIN LOOP
+# logs births, deaths and the year bookkeeping when True
+DEBUG = False
+logging.basicConfig(level=logging.DEBUG if DEBUG else logging.WARNING)
+log = logging.getLogger("sim")
 previousMetadata = None
 previousGlobalTimeCSV = 0
 globalTimeInDays = 0
-while True:
+# the simulation ticks at a steady 20 hz, however fast we render
+simStep = 1 / 20
+simTimeOwed = 0
+clickedMetadata = None
+# what the ui is showing right now, so we only rebuild text when it changes
+lastYear = -1
+lastClicked = None
+lastPred = -1
+lastPrey = -1
+
+
+# the simulation runs as its own panda3d task, stepping in fixed sized ticks
+def simTask(task):
+    global simTimeOwed, globalTimeInDays, clickedMetadata
+    # don't try to catch up on more than a quarter second after a hitch
+    simTimeOwed = min(simTimeOwed + globalClock.getDt(), 0.25)
+    while simTimeOwed >= simStep:
+        clickedMetadata = envio.updateCreatures(simStep)
+        globalTimeInDays += 42 * simStep
+        simTimeOwed -= simStep
+    return task.cont
+
+
+taskMgr.add(simTask, "sim")
+
+
+# ursina calls this once per frame, it only keeps the ui and csv in step with the sim
+def update():
+    global previousGlobalTimeCSV, lastYear, lastClicked, lastPred, lastPrey
     # first clear all clicked
     if envio.paused == False:
-        clickedMetadata = envio.updateCreatures()
         if clickedMetadata != None:
-            nameCounter.text = (
-                "Name: " + clickedMetadata["name"] + " " + clickedMetadata["lastname"]
-            )
-            ageCounter.text = "Age: " + str(clickedMetadata["age"] // 365)
-        globalTimeInDays += 42 * time.dt
-        yearCounter.text = "Year: " + str(globalTimeInDays // 365)
-        predCounter.text = "Predators: " + str(len(envio.predators))
-        preyCText = str(
-            len(
-                [
-                    rabbit
-                    for rabbit in envio.myEntities
-                    if rabbit.metadata["type"] == "Rabbit"
-                ]
-            )
-        )
-        rabCounter.text = "Prey: " + preyCText
+            name = clickedMetadata["name"] + " " + clickedMetadata["lastname"]
+            age = int(clickedMetadata["age"] // 365)
+            if (name, age) != lastClicked:
+                nameCounter.text = "Name: " + name
+                ageCounter.text = "Age: " + str(age)
+                lastClicked = (name, age)
+        year = int(globalTimeInDays // 365)
+        if year != lastYear:
+            yearCounter.text = "Year: " + str(year)
+            lastYear = year
+        # the counts only move on a birth or death
+        pred = len(envio.predators)
+        if pred != lastPred:
+            predCounter.text = "Predators: " + str(pred)
+            lastPred = pred
+        prey = len(envio.rabbits)
+        preyCText = str(prey)
+        if prey != lastPrey:
+            rabCounter.text = "Prey: " + preyCText
+            lastPrey = prey
         # handle csv input
-        print(globalTimeInDays // 365)
-        print("&")
-        print(previousGlobalTimeCSV)
-        print("eeee")
-        if globalTimeInDays // 365 != previousGlobalTimeCSV:
-            previousGlobalTimeCSV = globalTimeInDays // 365
-            logCSV(globalTimeInDays // 365, preyCText, len(envio.predators))
-    app.step()
+        log.debug("year %s & last logged %s", year, previousGlobalTimeCSV)
+        if year != previousGlobalTimeCSV:
+            previousGlobalTimeCSV = year
+            logCSV(year, preyCText, pred)
+
+
+app.run()
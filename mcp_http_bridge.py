@@ -13,13 +13,64 @@ from typing import Optional, Dict, Any
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse, JSONResponse, FileResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.exception_handlers import http_exception_handler, request_validation_exception_handler
+from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from pydantic import BaseModel
+import anyio
 import uvicorn
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
+from mcp.types import CONNECTION_CLOSED
+try:
+    from mcp.shared.exceptions import McpError
+except ImportError:  # renamed in the 2.x SDK
+    from mcp.shared.exceptions import MCPError as McpError
+
+# orjson serializes straight to bytes in C; fall back to the stdlib when missing
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    orjson = None
+
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered by orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+# Sent on every response so ngrok's free tier skips its browser warning page
+NGROK_HEADER = (b"ngrok-skip-browser-warning", b"true")
+
+
+class NgrokJSONResponse(OrjsonResponse):
+    """OrjsonResponse that carries the ngrok header, so no middleware is needed."""
+
+    def init_headers(self, headers=None) -> None:
+        super().init_headers(headers)
+        self.raw_headers.append(NGROK_HEADER)
+
+
+class NgrokStaticFiles(StaticFiles):
+    """StaticFiles whose file responses carry the ngrok header."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.raw_headers.append(NGROK_HEADER)
+        return response
 
 # Import for serving graphs
 OUTPUT_DIR = "simulation_outputs"
@@ -31,42 +82,162 @@ logger = logging.getLogger(__name__)
 # Global MCP client session
 mcp_session = None
 
+server_params = StdioServerParameters(
+    command="python",
+    args=["mcp_server.py"],
+    env=None
+)
+
+# Errors that mean the stdio pipe to mcp_server.py is gone
+BROKEN_PIPE_ERRORS = (ConnectionError, anyio.ClosedResourceError, anyio.BrokenResourceError)
+
+
+def is_broken_pipe(error: Exception) -> bool:
+    """True if `error` means the MCP server is unreachable, including the SDK's
+    own "Connection closed" error when the child process has exited."""
+    if isinstance(error, BROKEN_PIPE_ERRORS):
+        return True
+    return isinstance(error, McpError) and error.error.code == CONNECTION_CLOSED
+
+# SSE frames that never change, encoded once
+_SSE_CONNECTED = b'data: {"type": "connected", "message": "MCP Bridge connected"}\n\n'
+_PING_BYTES = b'data: {"type": "ping"}\n\n'
+
+# Tool listing as plain dicts, fetched once per MCP session
+_tools_cache = None
+
+# Set while mcp_session is usable / set to ask the keeper to reconnect
+_mcp_ready = asyncio.Event()
+_mcp_broken = asyncio.Event()
+
+
+async def keep_mcp_session():
+    """
+    Owns the MCP client for the life of the app.
+
+    Opens the stdio connection, publishes the session, and waits until it is
+    reported broken; then reconnects with exponential backoff. Living in one
+    task keeps anyio happy, since the context managers are entered and exited
+    in the same task.
+    """
+    global mcp_session, _tools_cache
+    delay = 0.5
+
+    while True:
+        try:
+            async with stdio_client(server_params) as (mcp_read, mcp_write):
+                async with ClientSession(mcp_read, mcp_write) as session:
+                    await session.initialize()
+                    mcp_session = session
+                    _mcp_ready.set()
+                    delay = 0.5
+                    logger.info("✓ MCP client initialized successfully")
+
+                    await _mcp_broken.wait()
+                    logger.warning("MCP connection lost, reconnecting")
+        except Exception as e:
+            logger.error(f"✗ Failed to initialize MCP client: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+        finally:
+            mcp_session = None
+            _tools_cache = None
+            _mcp_ready.clear()
+            _mcp_broken.clear()
+
+
+async def get_session(broken=None, timeout: float = 10):
+    """
+    Return the live MCP session, waiting for a (re)connect if needed.
+
+    Pass the session that just failed as `broken` to have it replaced; a
+    session that was already replaced by someone else is left alone.
+    """
+    if broken is not None and broken is mcp_session:
+        _mcp_ready.clear()
+        _mcp_broken.set()
+
+    try:
+        await asyncio.wait_for(_mcp_ready.wait(), timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="MCP client not initialized")
+    return mcp_session
+
+
+async def with_session(operation):
+    """Run `operation(session)`, reconnecting and retrying once on a broken pipe."""
+    session = await get_session()
+    try:
+        return await operation(session)
+    except Exception as e:
+        if not is_broken_pipe(e):
+            raise
+        logger.warning(f"MCP pipe broke ({e!r}), retrying on a fresh session")
+        session = await get_session(broken=session)
+        return await operation(session)
+
+
+async def get_tools():
+    """Return the MCP tool list, asking the server only once per session."""
+    global _tools_cache
+    if _tools_cache is None:
+        tools = await with_session(lambda session: session.list_tools())
+        _tools_cache = [
+            {
+                "name": tool.name,
+                "description": tool.description,
+                "inputSchema": tool.inputSchema
+            }
+            for tool in tools.tools
+        ]
+    return _tools_cache
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize and cleanup MCP client"""
-    global mcp_session
-    
-    # Startup: Initialize MCP client
-    server_params = StdioServerParameters(
-        command="python",
-        args=["mcp_server.py"],
-        env=None
-    )
-    
+    keeper = asyncio.create_task(keep_mcp_session())
+
     try:
-        # Create stdio connection to MCP server (use async context manager)
-        async with stdio_client(server_params) as (mcp_read, mcp_write):
-            # Initialize session (also use async context manager)
-            async with ClientSession(mcp_read, mcp_write) as session:
-                mcp_session = session
-                await mcp_session.initialize()
-                
-                logger.info("✓ MCP client initialized successfully")
-                
-                yield
-        
-    except Exception as e:
-        logger.error(f"✗ Failed to initialize MCP client: {e}")
-        raise
+        await asyncio.wait_for(_mcp_ready.wait(), 30)
+    except asyncio.TimeoutError:
+        logger.error("✗ MCP client not ready yet, will keep retrying in the background")
+
+    try:
+        yield
+    finally:
+        keeper.cancel()
+        try:
+            await keeper
+        except asyncio.CancelledError:
+            pass
 
 # Create FastAPI app with lifespan
 app = FastAPI(
     title="AURA Ecology MCP Bridge",
     description="HTTP bridge for AURA Ecology MCP Server",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=NgrokJSONResponse
 )
 
+# Error responses are built by FastAPI's handlers rather than the default
+# response class, so they get the ngrok header here; StarletteHTTPException
+# also covers the 404s StaticFiles raises
+@app.exception_handler(StarletteHTTPException)
+async def ngrok_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    response = await http_exception_handler(request, exc)
+    response.raw_headers.append(NGROK_HEADER)
+    return response
+
+
+@app.exception_handler(RequestValidationError)
+async def ngrok_validation_exception_handler(request: Request, exc: RequestValidationError):
+    response = await request_validation_exception_handler(request, exc)
+    response.raw_headers.append(NGROK_HEADER)
+    return response
+
+
 # Enable CORS for ElevenLabs integration
 app.add_middleware(
     CORSMiddleware,
@@ -76,13 +247,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Middleware to bypass ngrok browser warning
-@app.middleware("http")
-async def add_ngrok_skip_header(request: Request, call_next):
-    """Add header to bypass ngrok browser warning on free tier"""
-    response = await call_next(request)
-    response.headers["ngrok-skip-browser-warning"] = "true"
-    return response
+# Serve generated graphs straight from disk; StaticFiles rejects paths that
+# escape OUTPUT_DIR and streams the file without going through a route handler
+os.makedirs(OUTPUT_DIR, exist_ok=True)
+app.mount("/graphs", NgrokStaticFiles(directory=OUTPUT_DIR), name="graphs")
 
 
 # Request models for validation
@@ -97,21 +265,22 @@ class SimulationRequest(BaseModel):
     predation_rate: Optional[float] = 0.02
     predator_efficiency: Optional[float] = 0.01
     predator_death_rate: Optional[float] = 0.3
+    method: Optional[str] = "euler"
+    generate_plot: Optional[bool] = True
 
 class RiskRequest(BaseModel):
     species: Optional[str] = "predator"
     years_to_analyze: Optional[float] = 10
 
 
-@app.get("/")
-async def root():
-    """Root endpoint with API information."""
+# Root endpoint payload, built once; the two variants only differ in mcp_connected
+def _root_response(mcp_connected: bool) -> Dict[str, Any]:
     return {
         "name": "AURA Ecology MCP Bridge",
         "version": "1.0.0",
         "description": "HTTP Bridge for AURA Ecological MCP Server",
         "status": "operational",
-        "mcp_connected": mcp_session is not None,
+        "mcp_connected": mcp_connected,
         "protocol": "mcp",
         "endpoints": {
             "GET /health": "Health check",
@@ -127,27 +296,27 @@ async def root():
     }
 
 
+_ROOT_RESPONSES = {connected: _root_response(connected) for connected in (True, False)}
+
+
+@app.get("/")
+async def root():
+    """Root endpoint with API information."""
+    return _ROOT_RESPONSES[mcp_session is not None]
+
+
 # MCP Protocol Endpoints for ElevenLabs
 @app.get("/mcp/list-tools")
 @app.post("/mcp/list-tools")
 async def mcp_list_tools():
     """MCP protocol endpoint for listing tools - compatible with ElevenLabs"""
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
+    await get_session()
     
     try:
-        tools = await mcp_session.list_tools()
         return {
             "jsonrpc": "2.0",
             "result": {
-                "tools": [
-                    {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "inputSchema": tool.inputSchema
-                    }
-                    for tool in tools.tools
-                ]
+                "tools": await get_tools()
             }
         }
     except Exception as e:
@@ -174,26 +343,36 @@ async def health_check():
 @app.get("/tools")
 async def list_tools():
     """List available MCP tools"""
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
+    await get_session()
     
     try:
-        tools = await mcp_session.list_tools()
         return {
-            "tools": [
-                {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "inputSchema": tool.inputSchema
-                }
-                for tool in tools.tools
-            ]
+            "tools": await get_tools()
         }
     except Exception as e:
         logger.error(f"Error listing tools: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+async def _call_mcp_tool(name: str, arguments: Dict[str, Any]) -> NgrokJSONResponse:
+    """Call an MCP tool and wrap its first text block in the bridge's success envelope."""
+    await get_session()
+
+    try:
+        result = await with_session(
+            lambda session: session.call_tool(name, arguments=arguments)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error calling {name}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    content = result.content
+    text = content[0].text if content and hasattr(content[0], 'text') else str(result)
+    return NgrokJSONResponse(content={"status": "success", "tool": name, "result": text})
+
+
 @app.post("/tools/generate_ecological_report")
 async def generate_ecological_report_endpoint(request: ReportRequest = None):
     """
@@ -202,32 +381,9 @@ async def generate_ecological_report_endpoint(request: ReportRequest = None):
     Analyzes historical population data from simulation runs.
     Returns statistics, trends, and ecological insights using APES terminology.
     """
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
-    
-    try:
-        arguments = request.dict() if request else {}
-        result = await mcp_session.call_tool("generate_ecological_report", arguments=arguments)
-        
-        # Extract text content from result
-        if hasattr(result, 'content') and result.content:
-            content = result.content[0]
-            if hasattr(content, 'text'):
-                return JSONResponse(content={
-                    "status": "success",
-                    "tool": "generate_ecological_report",
-                    "result": content.text
-                })
-        
-        return JSONResponse(content={
-            "status": "success",
-            "tool": "generate_ecological_report",
-            "result": str(result)
-        })
-        
-    except Exception as e:
-        logger.error(f"Error generating report: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # only send what the caller set, mcp_server.py fills in the same defaults
+    arguments = request.model_dump(exclude_unset=True) if request else {}
+    return await _call_mcp_tool("generate_ecological_report", arguments)
 
 
 @app.post("/tools/run_lotka_volterra_simulation")
@@ -238,31 +394,8 @@ async def run_lotka_volterra_simulation_endpoint(request: SimulationRequest):
     Generates population forecasts and visualizations for what-if scenarios.
     Returns predictions and URL to generated graph.
     """
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
-    
-    try:
-        result = await mcp_session.call_tool("run_lotka_volterra_simulation", arguments=request.dict())
-        
-        # Extract text content
-        if hasattr(result, 'content') and result.content:
-            content = result.content[0]
-            if hasattr(content, 'text'):
-                return JSONResponse(content={
-                    "status": "success",
-                    "tool": "run_lotka_volterra_simulation",
-                    "result": content.text
-                })
-        
-        return JSONResponse(content={
-            "status": "success",
-            "tool": "run_lotka_volterra_simulation",
-            "result": str(result)
-        })
-        
-    except Exception as e:
-        logger.error(f"Error running simulation: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    arguments = request.model_dump(exclude_unset=True)
+    return await _call_mcp_tool("run_lotka_volterra_simulation", arguments)
 
 
 @app.post("/tools/calculate_extinction_risk")
@@ -273,62 +406,41 @@ async def calculate_extinction_risk_endpoint(request: RiskRequest = None):
     Analyzes recent population trends to determine extinction probability.
     Returns risk score (1-10) and vulnerability factors.
     """
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
-    
-    try:
-        arguments = request.dict() if request else {}
-        result = await mcp_session.call_tool("calculate_extinction_risk", arguments=arguments)
-        
-        # Extract text content
-        if hasattr(result, 'content') and result.content:
-            content = result.content[0]
-            if hasattr(content, 'text'):
-                return JSONResponse(content={
-                    "status": "success",
-                    "tool": "calculate_extinction_risk",
-                    "result": content.text
-                })
-        
-        return JSONResponse(content={
-            "status": "success",
-            "tool": "calculate_extinction_risk",
-            "result": str(result)
-        })
-        
-    except Exception as e:
-        logger.error(f"Error calculating extinction risk: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
-
+    arguments = request.model_dump(exclude_unset=True) if request else {}
+    return await _call_mcp_tool("calculate_extinction_risk", arguments)
 
 
-@app.get("/graphs/{filename}")
-async def get_graph(filename: str):
-    """
-    Serve generated prediction graphs.
-    
-    Returns PNG images generated by the Lotka-Volterra simulation tool.
-    """
-    file_path = os.path.join(OUTPUT_DIR, filename)
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="Graph not found")
-    return FileResponse(file_path, media_type="image/png")
+# (directory mtime, response) from the last scan of OUTPUT_DIR
+_graphs_cache = (None, None)
 
 
 @app.get("/graphs")
 async def list_graphs():
     """List all available prediction graphs."""
+    global _graphs_cache
     try:
+        try:
+            mtime = os.stat(OUTPUT_DIR).st_mtime_ns
+        except FileNotFoundError:
+            return {"graphs": [], "count": 0}
+
+        # Adding or removing a file bumps the directory mtime, so rescan only then
+        cached_mtime, cached = _graphs_cache
+        if mtime == cached_mtime:
+            return cached
+
         graphs = []
-        if os.path.exists(OUTPUT_DIR):
-            for filename in os.listdir(OUTPUT_DIR):
-                if filename.endswith('.png'):
+        with os.scandir(OUTPUT_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith('.png'):
                     graphs.append({
-                        "filename": filename,
-                        "url": f"/graphs/{filename}",
-                        "path": os.path.join(OUTPUT_DIR, filename)
+                        "filename": entry.name,
+                        "url": f"/graphs/{entry.name}",
+                        "path": os.path.join(OUTPUT_DIR, entry.name)
                     })
-        return {"graphs": graphs, "count": len(graphs)}
+        response = {"graphs": graphs, "count": len(graphs)}
+        _graphs_cache = (mtime, response)
+        return response
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -341,39 +453,30 @@ async def sse_endpoint(request: Request = None):
     This is used by ElevenLabs to discover and connect to MCP tools.
     Supports both GET and POST methods for compatibility.
     """
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
+    await get_session()
     
     async def event_generator():
         try:
             # Send initial connection message
-            yield f"data: {json.dumps({'type': 'connected', 'message': 'MCP Bridge connected'})}\n\n"
+            yield _SSE_CONNECTED
             
             # List available tools
-            tools = await mcp_session.list_tools()
             tools_data = {
                 "type": "tools",
-                "tools": [
-                    {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "inputSchema": tool.inputSchema
-                    }
-                    for tool in tools.tools
-                ]
+                "tools": await get_tools()
             }
-            yield f"data: {json.dumps(tools_data)}\n\n"
+            yield b"data: " + dumps(tools_data) + b"\n\n"
             
             # Keep connection alive with pings
             while True:
                 await asyncio.sleep(30)
-                yield f"data: {json.dumps({'type': 'ping', 'timestamp': asyncio.get_event_loop().time()})}\n\n"
+                yield _PING_BYTES
                 
         except asyncio.CancelledError:
             logger.info("SSE connection closed")
         except Exception as e:
             logger.error(f"SSE error: {e}")
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield b"data: " + dumps({'type': 'error', 'message': str(e)}) + b"\n\n"
     
     return StreamingResponse(
         event_generator(),
@@ -381,7 +484,8 @@ async def sse_endpoint(request: Request = None):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*"
+            "Access-Control-Allow-Origin": "*",
+            "ngrok-skip-browser-warning": "true"
         }
     )
 
@@ -392,38 +496,23 @@ async def mcp_call(request: Request):
     Generic MCP tool call endpoint.
     Allows calling any MCP tool by name with custom arguments.
     """
-    if not mcp_session:
-        raise HTTPException(status_code=503, detail="MCP client not initialized")
-    
     try:
         body = await request.json()
-        tool_name = body.get("tool")
-        arguments = body.get("arguments", {})
-        
-        if not tool_name:
-            raise HTTPException(status_code=400, detail="Missing 'tool' parameter")
-        
-        result = await mcp_session.call_tool(tool_name, arguments=arguments)
-        
-        # Extract text content
-        if hasattr(result, 'content') and result.content:
-            content = result.content[0]
-            if hasattr(content, 'text'):
-                return JSONResponse(content={
-                    "status": "success",
-                    "tool": tool_name,
-                    "result": content.text
-                })
-        
-        return JSONResponse(content={
-            "status": "success",
-            "tool": tool_name,
-            "result": str(result)
-        })
-        
-    except Exception as e:
-        logger.error(f"Error calling tool: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Request body must be JSON")
+    
+    if not isinstance(body, dict):
+        raise HTTPException(status_code=400, detail="Request body must be a JSON object")
+    
+    tool_name = body.get("tool")
+    if not tool_name:
+        raise HTTPException(status_code=400, detail="Missing 'tool' parameter")
+    
+    arguments = body.get("arguments", {})
+    if not isinstance(arguments, dict):
+        raise HTTPException(status_code=400, detail="'arguments' must be a JSON object")
+    
+    return await _call_mcp_tool(tool_name, arguments)
 
 
 
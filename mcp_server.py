@@ -4,16 +4,22 @@ MCP Server: Ecological Predictor
 An MCP server for ecological simulation analysis, prediction, and risk assessment.
 """
 
+import io
 import json
 import os
-import csv
+import hashlib
+import warnings
 import math
 import matplotlib
 matplotlib.use('Agg')  # Use non-interactive backend
 import matplotlib.pyplot as plt
 import numpy as np
+from scipy.integrate import solve_ivp
 from datetime import datetime
+from time import strftime
 from pathlib import Path
+from dataclasses import dataclass
+from collections import OrderedDict
 from typing import Any, Dict, List, Tuple
 import asyncio
 
@@ -27,11 +33,21 @@ except ImportError:
     print("Error: MCP SDK not installed. Please run: pip install mcp")
     exit(1)
 
+# numba compiles the Lotka-Volterra loop to machine code when it is installed;
+# without it the same function simply runs as plain Python
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        return lambda function: function
+
 # Configuration
 DATA_FILE = "population_data.csv"
 CONTEXT_FILE = "TOTC_CONTEXT.json"
 OUTPUT_DIR = "simulation_outputs"
 SERVER_NAME = "Ecological Predictor"
+MAX_INITIAL_POPULATION = 1e12  # largest starting population a forecast accepts
+TREND_WINDOW = 2  # steps the extinction risk trend looks back over
 
 # Ensure output directory exists
 Path(OUTPUT_DIR).mkdir(exist_ok=True)
@@ -40,53 +56,268 @@ Path(OUTPUT_DIR).mkdir(exist_ok=True)
 server = Server(SERVER_NAME)
 
 
-def load_population_data() -> List[Dict[str, float]]:
-    """Load population data from CSV file."""
-    data = []
+# fastmath is safe here: populations are always finite, so nothing relies
+# on NaN or infinity semantics
+@njit(cache=True, fastmath=True)
+def _lv_step(prey_0, pred_0, alpha, beta, delta, gamma, dt, steps):
+    """Integrate the discrete Lotka-Volterra model, returning (time, prey, predators)."""
+    time = np.arange(steps) * dt
+    prey = np.zeros(steps)
+    predators = np.zeros(steps)
+    
+    # Initial conditions
+    prey[0] = prey_0
+    predators[0] = pred_0
+    
+    # Rates scaled by the step size once, not on every step
+    alpha_dt = alpha * dt
+    beta_dt = beta * dt
+    delta_dt = delta * dt
+    gamma_dt = gamma * dt
+    
+    for i in range(1, steps):
+        p = prey[i-1]
+        q = predators[i-1]
+        
+        # dPrey/dt = alpha*Prey - beta*Prey*Predators
+        # dPredators/dt = delta*Prey*Predators - gamma*Predators
+        inter = p * q
+        prey_change = alpha_dt * p - beta_dt * inter
+        pred_change = delta_dt * inter - gamma_dt * q
+        
+        # Anything below 0.1 (negative values included) is extinct; a single
+        # select per species instead of a clamp followed by a second test
+        prey_next = p + prey_change
+        pred_next = q + pred_change
+        prey[i] = prey_next if prey_next >= 0.1 else 0.0
+        predators[i] = pred_next if pred_next >= 0.1 else 0.0
+        
+        # Both extinct is a fixed point: every later step would be zero too,
+        # and the arrays were zero-filled up front
+        if prey[i] == 0.0 and predators[i] == 0.0:
+            break
+    
+    return time, prey, predators
+
+
+# Compile the kernel now, with the argument types the tools pass it, so
+# the first request doesn't wait on numba; cache=True lets later processes
+# load the compiled code from __pycache__ instead
+_lv_step(1.0, 1.0, 0.5, 0.02, 0.01, 0.3, 0.1, 10)
+
+
+def _lv_solve_ivp(prey_0, pred_0, alpha, beta, delta, gamma, dt, steps):
+    """
+    Solve the continuous Lotka-Volterra model with LSODA, sampled on the same
+    time grid as _lv_step. A species that falls below 0.1 goes extinct: the
+    solve stops there and the survivor follows its closed-form solution alone.
+    """
+    time = np.arange(steps) * dt
+    prey = np.zeros(steps)
+    predators = np.zeros(steps)
+    if steps < 2:
+        prey[:1] = prey_0
+        predators[:1] = pred_0
+        return time, prey, predators
+    
+    def rhs(t, y):
+        x, p = y
+        return (alpha * x - beta * x * p, delta * x * p - gamma * p)
+    
+    def prey_extinct(t, y):
+        return y[0] - 0.1
+    
+    def predators_extinct(t, y):
+        return y[1] - 0.1
+    
+    for event in (prey_extinct, predators_extinct):
+        event.terminal = True
+        event.direction = -1
+    
+    sol = solve_ivp(
+        rhs, (0.0, time[-1]), [prey_0, pred_0],
+        method='LSODA', t_eval=time, events=(prey_extinct, predators_extinct),
+        rtol=1e-6, atol=1e-8
+    )
+    # A failed solve leaves the rest of the grid unfilled, and those zeros
+    # would read as an extinction
+    if sol.status == -1:
+        raise RuntimeError(f"LSODA integration failed: {sol.message}")
+    
+    n = sol.y.shape[1]
+    prey[:n] = sol.y[0]
+    predators[:n] = sol.y[1]
+    
+    # An extinction stopped the solve: the survivor grows or decays on its own
+    if sol.status == 1 and n < steps:
+        tail = time[n:]
+        if len(sol.t_events[0]):
+            t_e, (_, q_e) = sol.t_events[0][0], sol.y_events[0][0]
+            predators[n:] = q_e * np.exp(-gamma * (tail - t_e))
+        else:
+            t_e, (p_e, _) = sol.t_events[1][0], sol.y_events[1][0]
+            prey[n:] = p_e * np.exp(alpha * (tail - t_e))
+    
+    # Same extinction floor as the discrete model; once gone, a species stays gone
+    prey[np.logical_or.accumulate(prey < 0.1)] = 0.0
+    predators[np.logical_or.accumulate(predators < 0.1)] = 0.0
+    
+    return time, prey, predators
+
+
+@dataclass
+class PopData:
+    """Population history as one numpy array per column (structure of arrays)."""
+    time: np.ndarray
+    prey: np.ndarray
+    predators: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.time)
+    
+    def __getitem__(self, index: slice) -> "PopData":
+        """Slice every column at once; basic slices are views, not copies."""
+        return PopData(self.time[index], self.prey[index], self.predators[index])
+
+
+def _empty_population_data() -> PopData:
+    return PopData(np.zeros(0), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+
+
+# One forecast figure reused for every plot; the lock keeps concurrent tool
+# calls from drawing over each other
+_forecast_fig, _forecast_ax = plt.subplots(figsize=(12, 6))
+_forecast_lock = asyncio.Lock()
+
+def _save_forecast_png(filepath: str) -> None:
+    """Render the forecast figure to memory, then write the PNG with one open and write."""
+    buf = io.BytesIO()
+    _forecast_fig.savefig(buf, format='png', dpi=150)
+    data = buf.getbuffer()
+    fd = os.open(filepath, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        written = 0
+        while written < len(data):
+            written += os.write(fd, data[written:])
+    finally:
+        os.close(fd)
+
+
+# Rendered forecast PNGs by a hash of the inputs that fully determine the curve,
+# least recently used first so the oldest entry is dropped once it is full
+_plot_cache: "OrderedDict[str, str]" = OrderedDict()
+PLOT_CACHE_SIZE = 256
+
+
+# Parsed CSV and its statistics, reused until the file (or its mtime) changes
+_data_cache = {'key': None, 'data': None, 'stats': None}
+
+
+def load_population_data() -> PopData:
+    """Load population data from CSV file (cached until the file changes)."""
+    try:
+        key = (DATA_FILE, os.stat(DATA_FILE).st_mtime_ns)
+    except FileNotFoundError:
+        return _empty_population_data()
+    if key == _data_cache['key']:
+        return _data_cache['data']
+    
     try:
         with open(DATA_FILE, 'r') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                data.append({
-                    'time': float(row['time']),
-                    'prey': int(row['prey']),
-                    'predators': int(row['predators'])
-                })
+            # Columns are found by header name, then numpy's C parser reads the rows
+            header = f.readline().strip().split(',')
+            if all(column in header for column in ('time', 'prey', 'predators')):
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', UserWarning)  # header-only file
+                    # usecols also skips any stray extra fields, like DictReader did
+                    table = np.loadtxt(
+                        f, delimiter=',', ndmin=2,
+                        usecols=(header.index('time'), header.index('prey'), header.index('predators'))
+                    )
+            else:
+                # Empty file, or not the simulation's CSV: no history to report
+                table = np.zeros((0, 3))
     except FileNotFoundError:
-        return []
+        return _empty_population_data()
+    
+    if table.size == 0:
+        data = _empty_population_data()
+    else:
+        data = PopData(
+            table[:, 0],
+            table[:, 1].astype(np.int64),
+            table[:, 2].astype(np.int64)
+        )
+    _data_cache.update(key=key, data=data, stats=None)
     return data
 
 
-def calculate_statistics(data: List[Dict[str, float]]) -> Dict[str, Any]:
+def calculate_statistics(data: PopData) -> Dict[str, Any]:
     """Calculate statistical measures from population data."""
-    if not data:
+    if not len(data):
         return {}
+    # The cached data set keeps its statistics alongside it
+    cached = data is _data_cache['data']
+    if cached and _data_cache['stats'] is not None:
+        return _data_cache['stats']
     
-    prey_populations = [d['prey'] for d in data]
-    predator_populations = [d['predators'] for d in data]
+    prey = data.prey
+    predators = data.predators
     
     stats = {
-        'prey_avg': np.mean(prey_populations),
-        'prey_max': max(prey_populations),
-        'prey_min': min(prey_populations),
-        'prey_std': np.std(prey_populations),
-        'predator_avg': np.mean(predator_populations),
-        'predator_max': max(predator_populations),
-        'predator_min': min(predator_populations),
-        'predator_std': np.std(predator_populations),
-        'total_years': data[-1]['time'] if data else 0
+        'prey_avg': prey.mean(),
+        'prey_max': int(prey.max()),
+        'prey_min': int(prey.min()),
+        'prey_std': prey.std(),
+        'predator_avg': predators.mean(),
+        'predator_max': int(predators.max()),
+        'predator_min': int(predators.min()),
+        'predator_std': predators.std(),
+        'total_years': float(data.time[-1])
     }
     
     # Find extinction events
-    prey_extinct_time = next((d['time'] for d in data if d['prey'] == 0), None)
-    predator_extinct_time = next((d['time'] for d in data if d['predators'] == 0), None)
+    # argmax stops at the first True; a 0 there means the species never died out
+    idx = np.argmax(data.prey == 0)
+    prey_extinct_time = float(data.time[idx]) if data.prey[idx] == 0 else None
+    idx = np.argmax(data.predators == 0)
+    predator_extinct_time = float(data.time[idx]) if data.predators[idx] == 0 else None
     
     stats['prey_extinction_time'] = prey_extinct_time
     stats['predator_extinction_time'] = predator_extinct_time
     
+    if cached:
+        _data_cache['stats'] = stats
     return stats
 
 
+# Static part of the context resource; each read adds the live statistics
+_CONTEXT_TEMPLATE = {
+    "simulation_name": "AURA Ecology Simulation",
+    "description": "A predator-prey ecological simulation based on r/K selection theory",
+    "species": {
+        "prey": {
+            "name": "Rabbit",
+            "type": "r-selected",
+            "characteristics": "High reproduction rate, short lifespan, rapid population growth",
+            "strategy": "Opportunistic, fast-breeding species that thrives when resources are abundant"
+        },
+        "predator": {
+            "name": "Bobcat/Coyote",
+            "type": "K-selected",
+            "characteristics": "Low reproduction rate, longer lifespan, stable population",
+            "strategy": "Equilibrium species that maintains stable population near carrying capacity"
+        }
+    },
+    "simulation_rules": {
+        "prey_growth": "Exponential growth when predators are absent",
+        "predation": "Predators consume prey at a rate proportional to encounters",
+        "predator_decline": "Predators die off when prey becomes scarce",
+        "carrying_capacity": "Environment can support limited populations"
+    }
+}
+
+
 @server.list_resources()
 async def handle_list_resources() -> list[types.Resource]:
     """List available resources (context file)."""
@@ -105,35 +336,12 @@ async def handle_read_resource(uri: str) -> str:
     """Read the context resource."""
     if CONTEXT_FILE in uri:
         # Load current data and create context
-        data = load_population_data()
+        data = await asyncio.to_thread(load_population_data)
         stats = calculate_statistics(data)
         
-        context = {
-            "simulation_name": "AURA Ecology Simulation",
-            "description": "A predator-prey ecological simulation based on r/K selection theory",
-            "species": {
-                "prey": {
-                    "name": "Rabbit",
-                    "type": "r-selected",
-                    "characteristics": "High reproduction rate, short lifespan, rapid population growth",
-                    "strategy": "Opportunistic, fast-breeding species that thrives when resources are abundant"
-                },
-                "predator": {
-                    "name": "Bobcat/Coyote",
-                    "type": "K-selected",
-                    "characteristics": "Low reproduction rate, longer lifespan, stable population",
-                    "strategy": "Equilibrium species that maintains stable population near carrying capacity"
-                }
-            },
-            "simulation_rules": {
-                "prey_growth": "Exponential growth when predators are absent",
-                "predation": "Predators consume prey at a rate proportional to encounters",
-                "predator_decline": "Predators die off when prey becomes scarce",
-                "carrying_capacity": "Environment can support limited populations"
-            },
-            "current_statistics": stats,
-            "last_updated": datetime.now().isoformat()
-        }
+        context = _CONTEXT_TEMPLATE.copy()
+        context["current_statistics"] = stats
+        context["last_updated"] = datetime.now().isoformat()
         
         return json.dumps(context, indent=2)
     
@@ -198,6 +406,17 @@ async def handle_list_tools() -> list[types.Tool]:
                         "type": "number",
                         "description": "Predator natural death rate (gamma)",
                         "default": 0.3
+                    },
+                    "method": {
+                        "type": "string",
+                        "enum": ["euler", "lsoda"],
+                        "description": "Integration method: 'euler' steps the discrete model every 0.1 years, 'lsoda' solves the continuous equations adaptively (more accurate)",
+                        "default": "euler"
+                    },
+                    "generate_plot": {
+                        "type": "boolean",
+                        "description": "Render the forecast graph as a PNG; set to false when only the text forecast is needed",
+                        "default": True
                     }
                 },
                 "required": []
@@ -247,8 +466,8 @@ async def generate_ecological_report(args: Dict[str, Any]) -> list[types.TextCon
     """Generate comprehensive ecological analysis report."""
     focus = args.get('analysis_focus', 'overall')
     
-    data = load_population_data()
-    if not data:
+    data = await asyncio.to_thread(load_population_data)
+    if not len(data):
         return [types.TextContent(
             type="text",
             text="No historical data available. Please run the simulation first to collect population data."
@@ -284,8 +503,10 @@ async def generate_ecological_report(args: Dict[str, Any]) -> list[types.TextCon
         
         # r-selection characteristics
         if stats['prey_std'] > stats['prey_avg'] * 0.3:
-            report_lines.append("\n📊 r-Selection Pattern: HIGH population volatility observed")
-            report_lines.append("   Characteristic of opportunistic species with boom-bust cycles")
+            report_lines.extend([
+                "\n📊 r-Selection Pattern: HIGH population volatility observed",
+                "   Characteristic of opportunistic species with boom-bust cycles",
+            ])
     
     if focus in ['overall', 'predator']:
         report_lines.extend([
@@ -304,8 +525,10 @@ async def generate_ecological_report(args: Dict[str, Any]) -> list[types.TextCon
         
         # K-selection characteristics
         if stats['predator_std'] < stats['predator_avg'] * 0.3:
-            report_lines.append("\n📊 K-Selection Pattern: LOW population volatility observed")
-            report_lines.append("   Characteristic of equilibrium species near carrying capacity")
+            report_lines.extend([
+                "\n📊 K-Selection Pattern: LOW population volatility observed",
+                "   Characteristic of equilibrium species near carrying capacity",
+            ])
     
     if focus in ['overall', 'interactions']:
         report_lines.extend([
@@ -316,11 +539,15 @@ async def generate_ecological_report(args: Dict[str, Any]) -> list[types.TextCon
         
 
         if stats['prey_std'] > stats['prey_avg'] * 0.5:
-            report_lines.append("⚠️  HIGH INSTABILITY: Extreme population fluctuations detected")
-            report_lines.append("   Indicates oscillatory dynamics characteristic of Lotka-Volterra systems")
+            report_lines.extend([
+                "⚠️  HIGH INSTABILITY: Extreme population fluctuations detected",
+                "   Indicates oscillatory dynamics characteristic of Lotka-Volterra systems",
+            ])
         else:
-            report_lines.append("✓ STABLE SYSTEM: Populations show moderate variation")
-            report_lines.append("   System approaching equilibrium state")
+            report_lines.extend([
+                "✓ STABLE SYSTEM: Populations show moderate variation",
+                "   System approaching equilibrium state",
+            ])
     
     report_lines.extend([
         "\n" + "=" * 60,
@@ -341,59 +568,78 @@ async def run_lotka_volterra_simulation(args: Dict[str, Any]) -> list[types.Text
     beta = args.get('predation_rate', 0.02)    # predation rate
     delta = args.get('predator_efficiency', 0.01)  # predator efficiency
     gamma = args.get('predator_death_rate', 0.3)   # predator death rate
+    method = args.get('method', 'euler')
+    generate_plot = args.get('generate_plot', True)
     
     # Time steps
     dt = 0.1
     steps = int(years / dt)
+    # The compiled kernel doesn't bounds-check, so an empty run must never reach it
+    if steps < 1:
+        raise ValueError(f"years must be at least {dt} to simulate, got {years}")
+    # Beyond this LSODA can grind for minutes on a worker thread, and either
+    # integrator overflows into inf/nan
+    for name, value in (('initial_prey', prey_0), ('initial_predators', pred_0)):
+        if not math.isfinite(value) or abs(value) > MAX_INITIAL_POPULATION:
+            raise ValueError(f"{name} must be a finite number no larger than {MAX_INITIAL_POPULATION:g}, got {value}")
+    
+    # 'euler' is the discrete model (compiled with numba when available),
+    # 'lsoda' solves the continuous equations adaptively with scipy
+    if method == 'euler':
+        integrate = _lv_step
+    elif method == 'lsoda':
+        integrate = _lv_solve_ivp
+    else:
+        raise ValueError(f"Unknown integration method: {method}")
     
-    # Arrays to store results
-    time = np.zeros(steps)
-    prey = np.zeros(steps)
-    predators = np.zeros(steps)
-    
-    # Initial conditions
-    prey[0] = prey_0
-    predators[0] = pred_0
-    
-    # Lotka-Volterra equations (discrete time)
-    for i in range(1, steps):
-        time[i] = i * dt
-        
-        # dPrey/dt = alpha*Prey - beta*Prey*Predators
-        # dPredators/dt = delta*Prey*Predators - gamma*Predators
-        
-        prey_change = (alpha * prey[i-1] - beta * prey[i-1] * predators[i-1]) * dt
-        pred_change = (delta * prey[i-1] * predators[i-1] - gamma * predators[i-1]) * dt
-        
-        prey[i] = max(0, prey[i-1] + prey_change)
-        predators[i] = max(0, predators[i-1] + pred_change)
-        
-        # Check for extinction
-        if prey[i] < 0.1:
-            prey[i] = 0
-        if predators[i] < 0.1:
-            predators[i] = 0
+    time, prey, predators = await asyncio.to_thread(
+        integrate,
+        float(prey_0), float(pred_0),
+        float(alpha), float(beta), float(delta), float(gamma),
+        dt, steps
+    )
     
     # Generate plot
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"lotka_volterra_prediction_{timestamp}.png"
-    filepath = os.path.join(OUTPUT_DIR, filename)
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot(time, prey, 'b-', label='Prey (Rabbits)', linewidth=2)
-    plt.plot(time, predators, 'r-', label='Predators (Bobcats)', linewidth=2)
-    plt.xlabel('Time (years)', fontsize=12)
-    plt.ylabel('Population', fontsize=12)
-    plt.title('Lotka-Volterra Population Dynamics Prediction', fontsize=14, fontweight='bold')
-    plt.legend(fontsize=10)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=150)
-    plt.close()
+    filename = None
+    if generate_plot:
+        # Identical inputs reproduce the same curve, so the PNG from an earlier
+        # call is reused for as long as the file is still there
+        params = np.array([prey_0, pred_0, years, alpha, beta, delta, gamma, dt], dtype=np.float64)
+        key = hashlib.blake2b(params.tobytes() + method.encode(), digest_size=16).hexdigest()
+        filename = _plot_cache.get(key)
+        if filename is not None:
+            _plot_cache.move_to_end(key)
+        if filename is None or not os.path.exists(os.path.join(OUTPUT_DIR, filename)):
+            timestamp = strftime("%Y%m%d_%H%M%S")
+            filename = f"lotka_volterra_prediction_{timestamp}_{key[:8]}.png"
+            
+            async with _forecast_lock:
+                ax = _forecast_ax
+                ax.cla()
+                ax.plot(time, prey, 'b-', label='Prey (Rabbits)', linewidth=2)
+                ax.plot(time, predators, 'r-', label='Predators (Bobcats)', linewidth=2)
+                ax.set_xlabel('Time (years)', fontsize=12)
+                ax.set_ylabel('Population', fontsize=12)
+                ax.set_title('Lotka-Volterra Population Dynamics Prediction', fontsize=14, fontweight='bold')
+                ax.legend(fontsize=10)
+                ax.grid(True, alpha=0.3)
+                _forecast_fig.tight_layout()
+                # PNG encoding and the disk write run on a worker thread so other
+                # requests keep being served; the lock still holds the figure
+                await asyncio.to_thread(_save_forecast_png, os.path.join(OUTPUT_DIR, filename))
+            _plot_cache[key] = filename
+            _plot_cache.move_to_end(key)
+            if len(_plot_cache) > PLOT_CACHE_SIZE:
+                _plot_cache.popitem(last=False)
+        filepath = os.path.join(OUTPUT_DIR, filename)
     
     # Analyze results
-    prey_extinct = np.min(prey) < 1
-    pred_extinct = np.min(predators) < 1
+    # argmax finds the first True without building an index array; if that
+    # entry is False the species never dropped below 1
+    prey_first = np.argmax(prey < 1)
+    pred_first = np.argmax(predators < 1)
+    prey_extinct = prey[prey_first] < 1
+    pred_extinct = predators[pred_first] < 1
     
     final_prey = prey[-1]
     final_pred = predators[-1]
@@ -418,13 +664,17 @@ async def run_lotka_volterra_simulation(args: Dict[str, Any]) -> list[types.Text
     ]
     
     if prey_extinct:
-        extinction_time = time[np.where(prey < 1)[0][0]]
-        narrative.append(f"⚠️  PREY EXTINCTION predicted at Year {extinction_time:.1f}")
-        narrative.append("   Without prey, predator population will also collapse")
+        extinction_time = time[prey_first]
+        narrative.extend([
+            f"⚠️  PREY EXTINCTION predicted at Year {extinction_time:.1f}",
+            "   Without prey, predator population will also collapse",
+        ])
     elif pred_extinct:
-        extinction_time = time[np.where(predators < 1)[0][0]]
-        narrative.append(f"⚠️  PREDATOR EXTINCTION predicted at Year {extinction_time:.1f}")
-        narrative.append("   Prey population will grow exponentially without predation")
+        extinction_time = time[pred_first]
+        narrative.extend([
+            f"⚠️  PREDATOR EXTINCTION predicted at Year {extinction_time:.1f}",
+            "   Prey population will grow exponentially without predation",
+        ])
     else:
         narrative.extend([
             f"Final Prey Population: {final_prey:.0f} individuals",
@@ -434,19 +684,24 @@ async def run_lotka_volterra_simulation(args: Dict[str, Any]) -> list[types.Text
         # Check for oscillations
         prey_range = np.max(prey) - np.min(prey)
         if prey_range > prey_0:
-            narrative.append("\n📊 OSCILLATORY DYNAMICS detected")
-            narrative.append("   Populations exhibit cyclic boom-bust patterns")
-            narrative.append("   This is characteristic of classic predator-prey relationships")
+            narrative.extend([
+                "\n📊 OSCILLATORY DYNAMICS detected",
+                "   Populations exhibit cyclic boom-bust patterns",
+                "   This is characteristic of classic predator-prey relationships",
+            ])
         else:
-            narrative.append("\n✓ STABLE EQUILIBRIUM trend")
-            narrative.append("   Populations converging toward balance")
-    
-    narrative.extend([
-        f"\n📈 Visualization saved: {filename}",
-        f"   Full path: {os.path.abspath(filepath)}",
-        f"   🔗 View graph online: https://unequilaterally-tendrillar-kyra.ngrok-free.dev/graphs/{filename}",
-        "\n" + "=" * 60
-    ])
+            narrative.extend([
+                "\n✓ STABLE EQUILIBRIUM trend",
+                "   Populations converging toward balance",
+            ])
+    
+    if filename:
+        narrative.extend([
+            f"\n📈 Visualization saved: {filename}",
+            f"   Full path: {os.path.abspath(filepath)}",
+            f"   🔗 View graph online: https://unequilaterally-tendrillar-kyra.ngrok-free.dev/graphs/{filename}",
+        ])
+    narrative.append("\n" + "=" * 60)
     
     return [types.TextContent(type="text", text="\n".join(narrative))]
 
@@ -456,8 +711,8 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
     species = args.get('species', 'predator')
     years_to_analyze = args.get('years_to_analyze', 10)
     
-    data = load_population_data()
-    if not data:
+    data = await asyncio.to_thread(load_population_data)
+    if not len(data):
         return [types.TextContent(
             type="text",
             text="No historical data available for risk assessment."
@@ -481,14 +736,19 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
         "\n" + "-" * 60
     ]
     
+    # Summary statistics for both species in one set of reductions;
+    # row 0 is prey and row 1 predators
+    both = np.stack([recent_data.prey, recent_data.predators])
+    means = both.mean(axis=1)
+    stds = both.std(axis=1)
+    mins = both.min(axis=1)
+    rows = {'prey': 0, 'predators': 1}
+    
     def assess_species_risk(pop_key: str, species_name: str, is_predator: bool = False) -> Tuple[float, str, List[str]]:
         """Assess risk for a single species."""
-        populations = [d[pop_key] for d in recent_data]
-        
-        avg_pop = np.mean(populations)
-        std_pop = np.std(populations)
-        min_pop = min(populations)
-        max_pop = max(populations)
+        row = rows[pop_key]
+        populations = both[row]
+        avg_pop, std_pop, min_pop = means[row], stds[row], mins[row]
         
         # Calculate coefficient of variation (CV)
         cv = (std_pop / avg_pop * 100) if avg_pop > 0 else 0
@@ -524,8 +784,10 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
             risk_factors.append(f"STABLE: Low volatility (CV={cv:.1f}%)")
         
         # Factor 3: Declining trend
-        if len(populations) >= 3:
-            recent_trend = populations[-1] - populations[-3]
+        if len(populations) > TREND_WINDOW:
+            # Net change over the last TREND_WINDOW steps, from one vectorised
+            # diff of just that tail, whatever the window size
+            recent_trend = np.diff(populations[-(TREND_WINDOW + 1):]).sum()
             if recent_trend < -avg_pop * 0.3:
                 risk_score += 2.0
                 risk_factors.append("HIGH: Significant declining trend detected")
@@ -535,8 +797,8 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
         
         # Factor 4: For predators, check food source stability
         if is_predator:
-            prey_populations = [d['prey'] for d in recent_data]
-            prey_cv = (np.std(prey_populations) / np.mean(prey_populations) * 100) if np.mean(prey_populations) > 0 else 0
+            prey_avg, prey_std = means[0], stds[0]
+            prey_cv = (prey_std / prey_avg * 100) if prey_avg > 0 else 0
             
             if prey_cv > 50:
                 risk_score += 1.5
@@ -570,8 +832,7 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
             f"Vulnerability Classification: {prey_vuln}",
             "\nRisk Factors Identified:"
         ])
-        for factor in prey_factors:
-            report_lines.append(f"  • {factor}")
+        report_lines.extend(f"  • {factor}" for factor in prey_factors)
     
     if species in ['predator', 'both']:
         pred_score, pred_vuln, pred_factors = assess_species_risk('predators', 'Predators', True)
@@ -583,8 +844,7 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
             f"Vulnerability Classification: {pred_vuln}",
             "\nRisk Factors Identified:"
         ])
-        for factor in pred_factors:
-            report_lines.append(f"  • {factor}")
+        report_lines.extend(f"  • {factor}" for factor in pred_factors)
     
     # Recommendations
     report_lines.extend([
@@ -595,18 +855,24 @@ async def calculate_extinction_risk(args: Dict[str, Any]) -> list[types.TextCont
     
     if species in ['predator', 'both']:
         if pred_score >= 7:
-            report_lines.append("⚠️  URGENT ACTION REQUIRED for predator population")
-            report_lines.append("   • Consider intervention to stabilize prey base")
-            report_lines.append("   • Monitor for Allee effects (breeding difficulties at low density)")
+            report_lines.extend([
+                "⚠️  URGENT ACTION REQUIRED for predator population",
+                "   • Consider intervention to stabilize prey base",
+                "   • Monitor for Allee effects (breeding difficulties at low density)",
+            ])
         elif pred_score >= 5:
-            report_lines.append("⚠️  Enhanced monitoring recommended for predators")
-            report_lines.append("   • Stabilize food web dynamics")
+            report_lines.extend([
+                "⚠️  Enhanced monitoring recommended for predators",
+                "   • Stabilize food web dynamics",
+            ])
     
     if species in ['prey', 'both']:
         if prey_score >= 7:
-            report_lines.append("⚠️  URGENT ACTION REQUIRED for prey population")
-            report_lines.append("   • Assess predation pressure")
-            report_lines.append("   • Evaluate habitat carrying capacity")
+            report_lines.extend([
+                "⚠️  URGENT ACTION REQUIRED for prey population",
+                "   • Assess predation pressure",
+                "   • Evaluate habitat carrying capacity",
+            ])
     
     report_lines.extend([
         "\n" + "=" * 60,
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script for the MCP HTTP Bridge
+Checks that the bridge recovers when the mcp_server.py child process dies
+"""
+
+import os
+import signal
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+from mcp_http_bridge import app
+
+
+SIMULATION = {"years": 5, "generate_plot": False}
+
+
+def mcp_server_children():
+    """PIDs of the mcp_server.py processes this bridge started."""
+    result = subprocess.run(["pgrep", "-P", str(os.getpid())], capture_output=True, text=True)
+    return [int(pid) for pid in result.stdout.split()]
+
+
+def test_reconnect():
+    """Kill the MCP server under a live bridge and make sure the next call still works."""
+    print("=" * 70)
+    print("TESTING MCP HTTP BRIDGE - RECONNECT")
+    print("=" * 70)
+    
+    with TestClient(app) as client:
+        print("\n" + "-" * 70)
+        print("TEST 1: tool call on a fresh session")
+        print("-" * 70)
+        
+        response = client.post("/tools/run_lotka_volterra_simulation", json=SIMULATION)
+        if response.status_code != 200:
+            print(f"\n✗ Test 1 FAILED: {response.status_code} {response.text}")
+            return False
+        print("\n✓ Test 1 PASSED")
+        
+        print("\n" + "-" * 70)
+        print("TEST 2: tool call after the MCP server process is killed")
+        print("-" * 70)
+        
+        children = mcp_server_children()
+        if not children:
+            print("\n✗ Test 2 FAILED: could not find the mcp_server.py process")
+            return False
+        for pid in children:
+            os.kill(pid, signal.SIGKILL)
+        
+        response = client.post("/tools/run_lotka_volterra_simulation", json=SIMULATION)
+        if response.status_code != 200:
+            print(f"\n✗ Test 2 FAILED: {response.status_code} {response.text}")
+            return False
+        if set(mcp_server_children()) & set(children):
+            print("\n✗ Test 2 FAILED: the killed process is still the bridge's child")
+            return False
+        print("\n✓ Test 2 PASSED")
+    
+    print("\n" + "=" * 70)
+    print("ALL TESTS PASSED ✓")
+    print("=" * 70)
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if test_reconnect() else 1)
@@ -5,12 +5,17 @@ Tests all three tools to ensure they work correctly
 """
 
 import asyncio
+import csv
+import os
 import sys
+import tempfile
+import mcp_server
 from mcp_server import (
     generate_ecological_report,
     run_lotka_volterra_simulation,
     calculate_extinction_risk,
-    load_population_data
+    load_population_data,
+    DATA_FILE
 )
 
 
@@ -20,8 +25,39 @@ async def test_all_tools():
     print("TESTING MCP SERVER - ECOLOGICAL PREDICTOR")
     print("=" * 70)
     
+    print("\n" + "-" * 70)
+    print("TEST 0: load_population_data")
+    print("-" * 70)
+    
+    # The shipped CSV has rows with a stray extra field; every row must still
+    # load, with the same values csv.DictReader reads
+    try:
+        data = load_population_data()
+        if os.path.exists(DATA_FILE):
+            with open(DATA_FILE, 'r') as f:
+                rows = list(csv.DictReader(f))
+            assert len(data) == len(rows), f"loaded {len(data)} of {len(rows)} rows"
+            assert list(data.time) == [float(row['time']) for row in rows]
+            assert list(data.prey) == [int(row['prey']) for row in rows]
+            assert list(data.predators) == [int(row['predators']) for row in rows]
+        
+        # An empty file and a header-only file both mean no history yet
+        with tempfile.TemporaryDirectory() as folder:
+            for name, contents in (("empty.csv", ""), ("header_only.csv", "time,prey,predators\n")):
+                path = os.path.join(folder, name)
+                with open(path, 'w') as f:
+                    f.write(contents)
+                mcp_server.DATA_FILE = path
+                try:
+                    assert len(load_population_data()) == 0, f"{name} should load as no data"
+                finally:
+                    mcp_server.DATA_FILE = DATA_FILE
+        print("\n✓ Test 0 PASSED")
+    except Exception as e:
+        print(f"\n✗ Test 0 FAILED: {e}")
+        return False
+    
     # Check if data exists
-    data = load_population_data()
     if not data:
         print("\n⚠️  WARNING: No simulation data found in data.csv")
         print("   Please run 'python main.py' first to generate data.")